@@ -5,49 +5,155 @@ Optimized for GitHub Actions - Runs every 3 hours via GitHub scheduler
 """
 
 import os
+import atexit
 import json
 import base64
-import tempfile
+import hashlib
 import time
+import random
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import pandas as pd
 import zipfile
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
 from io import StringIO
 import threading
+import multiprocessing
 import queue
 import re
 import io
 import warnings
+from collections import deque
+from contextlib import ExitStack
+from email.message import EmailMessage
+from email.policy import SMTP
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
 from lxml import etree
 
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload
-import zipfile
+from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload, build_http
+from googleapiclient.model import JsonModel
+
+try:
+    import orjson
+except ImportError:  # Optional speedup - fall back to stdlib json
+    orjson = None
+
+try:
+    import python_calamine  # noqa: F401 - enables pd.read_excel(engine='calamine')
+    EXCEL_ENGINES = ['calamine', None]
+except ImportError:  # Optional speedup - fall back to pandas' default engine
+    EXCEL_ENGINES = [None]
 
 warnings.filterwarnings("ignore")
 
+# Persisted dedup index: blake2b digests of "PO<US>Item" (not pandas' internal hash, which may change between versions)
+DEDUP_DIGEST_SIZE = 8
+DEDUP_INDEX_FORMAT = 'blake2b-64'
+
+# 403 error reasons Google APIs use for rate limiting (retried like a 429), lower-cased for matching.
+# Legacy bodies list them under error.errors, newer ones as ErrorInfo entries (RATE_LIMIT_EXCEEDED) under error.details.
+RATE_LIMIT_REASONS = {'ratelimitexceeded', 'userratelimitexceeded', 'rate_limit_exceeded'}
+
+# Timestamp format used in the summary email and summary sheet
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Attachment names we copy to Drive (.xls, .xlsx, .xlsm)
+EXCEL_FILENAME_RE = re.compile(r'\.xls[xm]?$', re.IGNORECASE)
+
+# Partial response for full message fetches: headers plus the part tree's filenames and attachment ids,
+# without inline body data. Selection can't recurse, so the deepest level keeps whole parts.
+_PART_FIELDS = 'filename,body/attachmentId'
+MESSAGE_FIELDS = (
+    f'payload(headers,{_PART_FIELDS},'
+    f'parts({_PART_FIELDS},parts({_PART_FIELDS},parts)))'
+)
+
+# Translation table replacing characters that aren't allowed in filenames with '_'
+_UNSAFE_FILENAME_TABLE = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+
+# SpreadsheetML namespace prefix for worksheet XML tags
+SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+# Shared default for MIME parts without a body, so the walker doesn't allocate one per part
+_EMPTY_BODY: Dict[str, Any] = {}
+
+# Translation table that deletes single quotes from cell values
+_QUOTE_TABLE = str.maketrans('', '', "'")
+
 # Configure logging for GitHub Actions
+# In the main process, file and console writes happen on a listener thread so log calls only enqueue.
+# Parse worker processes write nothing themselves: their log lines are returned to the parent and replayed.
+if multiprocessing.parent_process() is None:
+    _log_queue = queue.Queue()
+    _log_listener = QueueListener(
+        _log_queue,
+        logging.FileHandler('blinkit_hot_scheduler.log', delay=True),
+        logging.StreamHandler()
+    )
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    _log_handlers = [QueueHandler(_log_queue)]
+else:
+    _log_handlers = [logging.NullHandler()]
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('blinkit_hot_scheduler.log'),
-        logging.StreamHandler()
-    ]
+    handlers=_log_handlers
 )
 
+class FastJsonModel(JsonModel):
+    """JsonModel that serializes request bodies with orjson when it is installed"""
+    
+    def serialize(self, body_value):
+        if orjson is None:
+            return super().serialize(body_value)
+        if isinstance(body_value, dict) and 'data' not in body_value and self._data_wrapper:
+            body_value = {'data': body_value}
+        return orjson.dumps(body_value).decode('utf-8')
+
+
 class BlinkitHOTScheduler:
     def __init__(self):
+        self.creds = None
+        self.user_email = None
         self.gmail_service = None
         self.drive_service = None
         self.sheets_service = None
         
+        # Per-thread service clients (httplib2 connections are not thread-safe)
+        self._thread_local = threading.local()
+        
+        # (spreadsheet_id, sheet_name) pairs known to contain data this run
+        self._sheet_nonempty: Set[Tuple[str, str]] = set()
+        
+        # (spreadsheet_id, sheet_name) -> numeric sheetId
+        self._sheet_ids: Dict[Tuple[str, str], int] = {}
+        
+        # Drive file holding the persisted dedup key hashes
+        self._dedup_index_file_id: Optional[str] = None
+        
+        # Drive lookups cached for the run: (folder name, parent id) -> folder id, folder id -> file names
+        self._folder_cache: Dict[Tuple[str, str], str] = {}
+        self._folder_listing_cache: Dict[str, Set[str]] = {}
+        self._folder_checksum_cache: Dict[str, Set[str]] = {}
+        self._folder_listed: Set[str] = set()  # Folders whose full listing has been fetched
+        self._folder_listing_lock = threading.Lock()
+        
+        # Attachment names skipped because a file with the same content was already in their folder
+        # (folder id -> name -> when skipped), persisted so later runs treat them as existing without re-downloading
+        self._content_duplicates: Dict[str, Dict[str, str]] = {}
+        self._content_duplicates_file_id: Optional[str] = None
+        self._content_duplicates_changed = False
+        
         # API scopes
         self.gmail_scopes = [
             'https://www.googleapis.com/auth/gmail.readonly',
@@ -55,8 +161,10 @@ class BlinkitHOTScheduler:
         ]
         self.drive_scopes = ['https://www.googleapis.com/auth/drive']
         self.sheets_scopes = ['https://www.googleapis.com/auth/spreadsheets']
+        self.all_scopes = list(dict.fromkeys(self.gmail_scopes + self.drive_scopes + self.sheets_scopes))
         
-        self.logs: List[Dict] = []
+        # Recent log entries for this run (timestamps come from the logging formatter)
+        self.logs: deque = deque(maxlen=10000)
         
         # Hardcoded configs (same as your Streamlit app)
         self.gmail_config = {
@@ -64,7 +172,12 @@ class BlinkitHOTScheduler:
             'search_term': 'GRN and reconciliation ',
             'days_back': 7,
             'max_results': 1000,
-            'gdrive_folder_id': '1pZnVxyPRJWaoYldxvWyXLFxQHbdckZfP'
+            'batch_size': 50,  # Gmail advises at most 50 calls per batch request
+            'attachment_workers': 10,  # Parallel attachment download + upload workers
+            'gdrive_folder_id': '1pZnVxyPRJWaoYldxvWyXLFxQHbdckZfP',
+            'resumable_threshold_bytes': 5 * 1024 * 1024,  # Use resumable uploads above this size
+            'upload_chunk_bytes': 8 * 1024 * 1024,  # Chunk size for resumable uploads
+            'content_duplicates_file': 'content_duplicate_attachments.json'  # Names skipped as same-content copies
         }
         
         self.excel_config = {
@@ -76,7 +189,13 @@ class BlinkitHOTScheduler:
             'max_results': 1000,
             'source_file_column': 'source_file_name',
             'item_code_column': 'Item_Code',  # Column name for Item_Code
-            'po_number_column': 'po_number'   # Column name for PO Number
+            'po_number_column': 'po_number',  # Column name for PO Number
+            'read_workers': 8,                # Parallel Drive download workers
+            'parse_processes': os.cpu_count() or 1,  # Worker processes for CPU-bound Excel parsing
+            'dedup_index_file': 'hot_dedup_keys.json',  # Persisted (PO, Item) key hashes in excel_folder_id
+            'manifest_sheet_name': 'hotgrn_processed_files',  # Tab listing source files already processed
+            'append_chunk_rows': 5000,        # Max rows per Sheets values.append request
+            'download_chunk_bytes': 16 * 1024 * 1024  # Drive download chunk size
         }
         
         # Summary sheet configuration
@@ -92,16 +211,15 @@ class BlinkitHOTScheduler:
         }
     
     def log(self, message: str, level: str = "INFO"):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = {"timestamp": timestamp, "level": level.upper(), "message": message}
-        self.logs.append(log_entry)
+        level = level.upper()
+        self.logs.append({"level": level, "message": message})
         
         # Different formatting for different levels
-        if level.upper() == "ERROR":
+        if level == "ERROR":
             logging.error(message)
-        elif level.upper() == "WARNING":
+        elif level == "WARNING":
             logging.warning(message)
-        elif level.upper() == "SUCCESS":
+        elif level == "SUCCESS":
             logging.info(f"✅ {message}")
         else:
             logging.info(message)
@@ -124,8 +242,7 @@ class BlinkitHOTScheduler:
                         token_content = f.read()
                         self.log(f"Token file size: {len(token_content)} bytes", "INFO")
                     
-                    creds = Credentials.from_authorized_user_file(token_file, 
-                        list(set(self.gmail_scopes + self.drive_scopes + self.sheets_scopes)))
+                    creds = Credentials.from_authorized_user_file(token_file, self.all_scopes)
                     
                     # Check if token is expired
                     if creds.expired:
@@ -149,7 +266,7 @@ class BlinkitHOTScheduler:
                                     try:
                                         flow = InstalledAppFlow.from_client_secrets_file(
                                             creds_file,
-                                            list(set(self.gmail_scopes + self.drive_scopes + self.sheets_scopes))
+                                            self.all_scopes
                                         )
                                         # For non-interactive environment, we need to handle this differently
                                         # Since we can't do local server in GitHub Actions
@@ -174,13 +291,16 @@ class BlinkitHOTScheduler:
                 return False
             
             # Build services
-            self.gmail_service = build('gmail', 'v1', credentials=creds)
-            self.drive_service = build('drive', 'v3', credentials=creds)
-            self.sheets_service = build('sheets', 'v4', credentials=creds)
+            self.creds = creds
+            self.gmail_service = self._build_service('gmail')
+            self.drive_service = self._build_service('drive')
+            # Sheets carries the large values payloads, so serialize its bodies with orjson
+            self.sheets_service = self._build_service('sheets', model=FastJsonModel())
             
             # Test authentication by making a simple API call
             try:
-                profile = self.gmail_service.users().getProfile(userId='me').execute()
+                profile = self.gmail_service.users().getProfile(userId='me', fields='emailAddress').execute()
+                self.user_email = profile.get('emailAddress')
                 self.log(f"Authenticated as: {profile.get('emailAddress', 'Unknown')}", "SUCCESS")
             except Exception as api_error:
                 self.log(f"Authentication test failed: {str(api_error)}", "ERROR")
@@ -198,7 +318,8 @@ class BlinkitHOTScheduler:
         """Search for emails with attachments"""
         try:
             # Build search query
-            query_parts = ["has:attachment"]
+            # Let Gmail drop emails without an Excel attachment (same extensions as EXCEL_FILENAME_RE)
+            query_parts = ["has:attachment", "(filename:xls OR filename:xlsx OR filename:xlsm)"]
             
             if sender:
                 query_parts.append(f'from:"{sender}"')
@@ -212,16 +333,16 @@ class BlinkitHOTScheduler:
                 else:
                     query_parts.append(f'"{search_term}"')
             
-            # Add date filter
+            # Add date filter (epoch seconds, so Gmail doesn't round to a PST day boundary)
             start_date = datetime.now() - timedelta(days=days_back)
-            query_parts.append(f"after:{start_date.strftime('%Y/%m/%d')}")
+            query_parts.append(f"after:{int(start_date.timestamp())}")
             
             query = " ".join(query_parts)
             self.log(f"Searching Gmail with query: {query}", "INFO")
             
             # Execute search
             result = self.gmail_service.users().messages().list(
-                userId='me', q=query, maxResults=max_results
+                userId='me', q=query, maxResults=max_results, fields='messages/id'
             ).execute()
             
             messages = result.get('messages', [])
@@ -250,13 +371,23 @@ class BlinkitHOTScheduler:
         try:
             self.log("Starting Gmail workflow...", "INFO")
             
-            # Search for emails
-            emails = self.search_emails(
-                sender=self.gmail_config['sender'],
-                search_term=self.gmail_config['search_term'],
-                days_back=self.gmail_config['days_back'],
-                max_results=self.gmail_config['max_results']
-            )
+            # Gmail and Drive can't share a batch request, so resolve the Drive base folder
+            # on a worker thread while the Gmail search runs
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                base_folder_name = "Gmail_Attachments"
+                base_folder_future = executor.submit(
+                    self._create_drive_folder, base_folder_name, self.gmail_config.get('gdrive_folder_id')
+                )
+                
+                # Search for emails
+                emails = self.search_emails(
+                    sender=self.gmail_config['sender'],
+                    search_term=self.gmail_config['search_term'],
+                    days_back=self.gmail_config['days_back'],
+                    max_results=self.gmail_config['max_results']
+                )
+                
+                base_folder_id = base_folder_future.result()
             
             gmail_summary['emails_checked'] = len(emails)
             
@@ -272,10 +403,6 @@ class BlinkitHOTScheduler:
             
             self.log(f"Found {len(emails)} emails matching criteria", "INFO")
             
-            # Create base folder in Drive
-            base_folder_name = "Gmail_Attachments"
-            base_folder_id = self._create_drive_folder(base_folder_name, self.gmail_config.get('gdrive_folder_id'))
-            
             if not base_folder_id:
                 self.log("Failed to create base folder in Google Drive", "ERROR")
                 return {
@@ -288,55 +415,103 @@ class BlinkitHOTScheduler:
             
             processed_emails = 0
             
+            # Fetch all full messages up front in batched requests
+            messages = self._get_messages_batch([email['id'] for email in emails])
+            
+            # Pass 1: walk each email's MIME tree and queue its Excel attachments (no attachment I/O yet)
+            email_entries = []
+            attachment_tasks = []
+            queued_files = set()
+            
             for i, email in enumerate(emails):
                 try:
-                    # Get email details first
-                    email_details = self._get_email_details(email['id'])
+                    message = messages.get(email['id'])
+                    if message is None:
+                        gmail_summary['attachments_failed'] += 1  # Count this email as failed
+                        continue
+                    
+                    # Sender and subject come from the full message headers, no extra call needed
+                    email_details = self._extract_email_details(email['id'], message)
                     subject = email_details.get('subject', 'No Subject')[:50]
                     sender = email_details.get('sender', 'Unknown')
                     
                     self.log(f"Processing email: {subject} from {sender}", "INFO")
                     
-                    # Get full message with payload
-                    message = self.gmail_service.users().messages().get(
-                        userId='me', id=email['id'], format='full'
-                    ).execute()
-                    
-                    if not message or not message.get('payload'):
+                    if not message.get('payload'):
                         self.log(f"No payload found for email: {subject}", "WARNING")
                         continue
                     
-                    # Extract attachments with detailed tracking
-                    attachment_stats = self._extract_attachments_from_email_detailed(
-                        email['id'], message['payload'], sender, self.gmail_config, base_folder_id
-                    )
+                    attachments = self._find_excel_attachments(message['payload'])
                     
-                    # Update summary
-                    gmail_summary['attachments_found'] += attachment_stats['total']
-                    gmail_summary['attachments_skipped'] += attachment_stats['skipped']
-                    gmail_summary['attachments_uploaded'] += attachment_stats['uploaded']
-                    gmail_summary['attachments_failed'] += attachment_stats['failed']
+                    # Resolve the destination folder once per email, and only when there is something to upload
+                    type_folder_id = None
+                    if attachments:
+                        type_folder_id = self._get_attachment_folder_id(sender, self.gmail_config, base_folder_id)
                     
-                    # Add to details
-                    gmail_summary['details'].append({
-                        'email_subject': subject,
-                        'sender': sender,
-                        'attachments_found': attachment_stats['total'],
-                        'attachments_uploaded': attachment_stats['uploaded'],
-                        'attachments_skipped': attachment_stats['skipped'],
-                        'attachments_failed': attachment_stats['failed']
-                    })
+                    attachment_stats = {'total': 0, 'uploaded': 0, 'skipped': 0, 'failed': 0}
+                    email_entries.append({'subject': subject, 'sender': sender, 'stats': attachment_stats})
                     
-                    if attachment_stats['total'] > 0:
-                        processed_emails += 1
-                        self.log(f"Found {attachment_stats['total']} attachments in: {subject} (Uploaded: {attachment_stats['uploaded']}, Skipped: {attachment_stats['skipped']}, Failed: {attachment_stats['failed']})", "SUCCESS")
-                    else:
-                        self.log(f"No matching attachments in: {subject}", "INFO")
+                    for attachment in attachments:
+                        attachment_stats['total'] += 1
+                        
+                        # Clean filename and make it unique
+                        final_filename = f"{email['id']}_{self._sanitize_filename(attachment['filename'])}"
+                        if (type_folder_id, final_filename) in queued_files:
+                            attachment_stats['skipped'] += 1
+                            continue
+                        
+                        queued_files.add((type_folder_id, final_filename))
+                        attachment_tasks.append((attachment_stats, email['id'], attachment, final_filename, type_folder_id))
                     
                 except Exception as e:
                     gmail_summary['attachments_failed'] += 1  # Count this email as failed
                     self.log(f"Failed to process email {email.get('id', 'unknown')}: {str(e)}", "ERROR")
             
+            # Pass 2: download and upload attachments in parallel
+            if attachment_tasks:
+                self._load_content_duplicates(base_folder_id)
+                
+                with ThreadPoolExecutor(max_workers=self.gmail_config['attachment_workers']) as executor:
+                    # List every destination folder concurrently first, so the per-attachment
+                    # existence checks are cache hits (failures are retried by those checks)
+                    wait([executor.submit(self._list_folder_names, folder_id)
+                          for folder_id in {task[4] for task in attachment_tasks}])
+                    
+                    futures = {
+                        executor.submit(self._download_and_upload_attachment, message_id, attachment, final_filename, type_folder_id): attachment_stats
+                        for attachment_stats, message_id, attachment, final_filename, type_folder_id in attachment_tasks
+                    }
+                    for future in as_completed(futures):
+                        futures[future][future.result()] += 1
+                
+                self._save_content_duplicates(base_folder_id)
+            
+            for entry in email_entries:
+                subject = entry['subject']
+                attachment_stats = entry['stats']
+                
+                # Update summary
+                gmail_summary['attachments_found'] += attachment_stats['total']
+                gmail_summary['attachments_skipped'] += attachment_stats['skipped']
+                gmail_summary['attachments_uploaded'] += attachment_stats['uploaded']
+                gmail_summary['attachments_failed'] += attachment_stats['failed']
+                
+                # Add to details
+                gmail_summary['details'].append({
+                    'email_subject': subject,
+                    'sender': entry['sender'],
+                    'attachments_found': attachment_stats['total'],
+                    'attachments_uploaded': attachment_stats['uploaded'],
+                    'attachments_skipped': attachment_stats['skipped'],
+                    'attachments_failed': attachment_stats['failed']
+                })
+                
+                if attachment_stats['total'] > 0:
+                    processed_emails += 1
+                    self.log(f"Found {attachment_stats['total']} attachments in: {subject} (Uploaded: {attachment_stats['uploaded']}, Skipped: {attachment_stats['skipped']}, Failed: {attachment_stats['failed']})", "SUCCESS")
+                else:
+                    self.log(f"No matching attachments in: {subject}", "INFO")
+            
             self.log(f"Gmail workflow completed! Processed {gmail_summary['attachments_uploaded']} attachments from {processed_emails} emails", "INFO")
             self.log(f"Summary: Found: {gmail_summary['attachments_found']}, Uploaded: {gmail_summary['attachments_uploaded']}, Skipped: {gmail_summary['attachments_skipped']}, Failed: {gmail_summary['attachments_failed']}", "INFO")
             
@@ -396,23 +571,32 @@ class BlinkitHOTScheduler:
             
             self.log(f"Found {len(all_excel_files)} Excel files containing 'GRN' in total", "INFO")
             
-            # Step 2: Get existing source files from Google Sheet
-            existing_source_files = self._get_existing_source_files(
+            # Step 2: Get already processed source files from the manifest tab (and whether the sheet has data)
+            existing_source_files, existing_checksums, sheet_has_data = self._get_processed_manifest(
                 self.excel_config['spreadsheet_id'], 
                 self.excel_config['sheet_name'],
                 self.excel_config['source_file_column']
             )
             
-            self.log(f"Found {len(existing_source_files)} existing source files in the sheet", "INFO")
+            self.log(f"Found {len(existing_source_files)} existing source files in the manifest", "INFO")
             
-            # Step 3: Filter out files that are already in the sheet
+            # Step 3: Filter out files that are already in the sheet, by name or by identical content
+            # (e.g. the same GRN forwarded again under a new name)
             new_excel_files = []
+            same_content_files = []
             for file in all_excel_files:
-                if file['name'] not in existing_source_files:
-                    new_excel_files.append(file)
-                else:
+                if file['name'] in existing_source_files:
                     excel_summary['files_skipped'] += 1
                     self.log(f"Skipping already processed file: {file['name']}", "INFO")
+                elif file.get('md5Checksum') in existing_checksums:
+                    excel_summary['files_skipped'] += 1
+                    same_content_files.append((file['name'], file.get('md5Checksum', '')))
+                    self.log(f"Skipping file with the same content as an already processed file: {file['name']}", "INFO")
+                else:
+                    new_excel_files.append(file)
+            
+            # Record content duplicates by name so later runs skip them without the checksum match
+            self._append_to_manifest(self.excel_config['spreadsheet_id'], same_content_files)
             
             self.log(f"Found {len(new_excel_files)} new files to process (not in sheet yet)", "INFO")
             
@@ -427,18 +611,20 @@ class BlinkitHOTScheduler:
                 }
             
             # Step 4: Process new files
-            sheet_has_data = self._check_sheet_has_data(
-                self.excel_config['spreadsheet_id'], 
+            # Digests of (PO, Item) keys already in the sheet, used to drop duplicates before appending
+            known_keys = self._load_dedup_keys(
+                self.excel_config['spreadsheet_id'],
                 self.excel_config['sheet_name']
             )
             
-            is_first_file = True
+            # Rows from every new file (with their key digests) are collected and written in a single append at the end
+            pending_frames = []
+            pending_keys = set()
+            duplicate_only_files = []
             
-            for i, file in enumerate(new_excel_files):
+            # Files are downloaded and parsed concurrently but collected in order
+            for file, df in self._read_excel_files_concurrently(new_excel_files, self.excel_config['header_row']):
                 try:
-                    # Read Excel file
-                    df = self._read_excel_file(file['id'], file['name'], self.excel_config['header_row'])
-                    
                     if df.empty:
                         excel_summary['files_failed'] += 1
                         self.log(f"No data extracted from: {file['name']}", "WARNING")
@@ -447,36 +633,79 @@ class BlinkitHOTScheduler:
                     # Ensure Item Code and PO Number are strings (but don't add apostrophe)
                     df = self._ensure_numeric_columns_as_strings(df)
                     
+                    # Drop rows whose PO number AND Item Code combination is already in the sheet
+                    # (or in a file queued earlier in this run)
+                    key_digests = None
+                    if known_keys is not None:
+                        key_digests = self._dedup_key_digests(df)
+                        if key_digests is not None:
+                            is_new = ~(key_digests.isin(known_keys) | key_digests.isin(pending_keys))
+                            excel_summary['duplicates_removed'] += int((~is_new).sum())
+                            df = df[is_new.values]
+                            key_digests = key_digests[is_new.values].tolist()
+                            pending_keys.update(key_digests)
+                    
+                    if df.empty:
+                        self.log(f"All rows from {file['name']} already exist in the sheet", "INFO")
+                        duplicate_only_files.append((file['name'], file.get('md5Checksum', '')))
+                        continue
+                    
                     # Add source file column to DataFrame
                     df[self.excel_config['source_file_column']] = file['name']
                     
                     self.log(f"Data shape: {df.shape} - Columns: {list(df.columns)[:3]}{'...' if len(df.columns) > 3 else ''}", "INFO")
+                    pending_frames.append((file, df, key_digests))
                     
-                    # Append to Google Sheet
-                    self._append_to_sheet_with_source(
-                        self.excel_config['spreadsheet_id'], 
-                        self.excel_config['sheet_name'], 
-                        df, 
-                        self.excel_config['source_file_column'],
-                        is_first_file and not sheet_has_data  # Only include headers if first file AND sheet is empty
-                    )
+                except Exception as e:
+                    excel_summary['files_failed'] += 1
+                    self.log(f"Failed to process Excel file {file.get('name', 'unknown')}: {str(e)}", "ERROR")
+            
+            processed_files = list(duplicate_only_files)
+            rows_appended = 0
+            
+            if pending_frames:
+                # Append to Google Sheet
+                rows_appended = self._append_to_sheet_with_source(
+                    self.excel_config['spreadsheet_id'], 
+                    self.excel_config['sheet_name'], 
+                    [df for _, df, _ in pending_frames], 
+                    self.excel_config['source_file_column'],
+                    not sheet_has_data  # Only include headers if sheet is empty
+                )
+                
+                # Rows went out in order, so the first rows_appended rows are in the sheet. Their keys are
+                # recorded even when a later chunk failed, so a retry of that file skips what already landed.
+                remaining = rows_appended
+                for file, df, key_digests in pending_frames:
+                    file_name = file['name']
+                    written = min(len(df), remaining)
+                    remaining -= written
+                    
+                    if known_keys is not None and key_digests is not None:
+                        known_keys.update(key_digests[:written])
+                    
+                    if written < len(df):
+                        excel_summary['files_failed'] += 1
+                        if written:
+                            self.log(f"Only {written} of {len(df)} rows from {file_name} were appended", "WARNING")
+                        continue
                     
+                    processed_files.append((file_name, file.get('md5Checksum', '')))
                     excel_summary['files_processed'] += 1
                     excel_summary['details'].append({
-                        'file_name': file['name'],
+                        'file_name': file_name,
                         'status': 'processed',
                         'rows_added': len(df)
                     })
-                    
-                    self.log(f"Appended data from: {file['name']}", "SUCCESS")
-                    is_first_file = False
-                    
-                except Exception as e:
-                    excel_summary['files_failed'] += 1
-                    self.log(f"Failed to process Excel file {file.get('name', 'unknown')}: {str(e)}", "ERROR")
+                    self.log(f"Appended data from: {file_name}", "SUCCESS")
             
-            # Step 5: Remove duplicates from the entire sheet based on PO number AND Item Code combination
-            if excel_summary['files_processed'] > 0:
+            self._append_to_manifest(self.excel_config['spreadsheet_id'], processed_files)
+            
+            # Step 5: Persist the dedup keys, or fall back to a full-sheet dedup if they couldn't be loaded
+            if known_keys is not None:
+                if rows_appended > 0:
+                    self._save_dedup_keys(known_keys)
+            elif rows_appended > 0:
                 duplicates_removed = self._remove_duplicates_by_po_and_item(
                     self.excel_config['spreadsheet_id'],
                     self.excel_config['sheet_name'],
@@ -532,6 +761,100 @@ class BlinkitHOTScheduler:
             self.log(f"Error converting numeric columns to strings: {str(e)}", "WARNING")
             return df
     
+    def _dedup_key_digests(self, df: pd.DataFrame) -> Optional[pd.Series]:
+        """Digest the normalized PO number AND Item Code combination of each row (stable across runs and versions)"""
+        po_number_col = self.excel_config['po_number_column']
+        item_code_col = self.excel_config['item_code_column']
+        
+        if po_number_col not in df.columns or item_code_col not in df.columns:
+            return None
+        
+        po_numbers, item_codes = (
+            df[col].astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+            for col in (po_number_col, item_code_col)
+        )
+        return pd.Series(
+            [
+                hashlib.blake2b(f"{po}\x1f{item}".encode('utf-8'), digest_size=DEDUP_DIGEST_SIZE).hexdigest()
+                for po, item in zip(po_numbers, item_codes)
+            ],
+            index=df.index,
+            dtype=object
+        )
+    
+    def _load_dedup_keys(self, spreadsheet_id: str, sheet_name: str) -> Optional[Set[str]]:
+        """Load persisted (PO, Item) key digests from Drive, building them from the sheet on first use"""
+        try:
+            index_file = self._find_drive_file(
+                self.excel_config['dedup_index_file'],
+                self.excel_config['excel_folder_id']
+            )
+            
+            if index_file:
+                self._dedup_index_file_id = index_file['id']
+                index = json.loads(self._download_drive_file(index_file['id']))
+                if isinstance(index, dict) and index.get('format') == DEDUP_INDEX_FORMAT:
+                    keys = set(index.get('keys', []))
+                    self.log(f"Loaded {len(keys)} dedup keys from Drive", "INFO")
+                    return keys
+                
+                # Written by an older version with a different key format - rebuild (and overwrite) it
+                self.log("Dedup index on Drive is in an old format, rebuilding it from the sheet", "WARNING")
+            
+            # No usable index yet - build it from what's already in the sheet
+            result = self.sheets_service.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id,
+                range=f"{sheet_name}!A:Z"
+            ).execute()
+            
+            values = result.get('values', [])
+            if not values or len(values) <= 1:
+                return set()
+            
+            key_digests = self._dedup_key_digests(pd.DataFrame(values[1:], columns=values[0]))
+            if key_digests is None:
+                self.log("Dedup key columns not found in sheet, falling back to full-sheet dedup", "WARNING")
+                return None
+            
+            keys = set(key_digests.tolist())
+            self.log(f"Built {len(keys)} dedup keys from existing sheet data", "INFO")
+            return keys
+            
+        except Exception as e:
+            self.log(f"Failed to load dedup keys: {str(e)}", "WARNING")
+            return None
+    
+    def _save_dedup_keys(self, keys: Set[str]):
+        """Persist (PO, Item) key digests to Drive for the next run"""
+        try:
+            index = {'format': DEDUP_INDEX_FORMAT, 'keys': sorted(keys)}
+            media = MediaIoBaseUpload(
+                io.BytesIO(json.dumps(index).encode('utf-8')),
+                mimetype='application/json'
+            )
+            
+            if self._dedup_index_file_id:
+                self.drive_service.files().update(
+                    fileId=self._dedup_index_file_id,
+                    media_body=media,
+                    fields='id'
+                ).execute()
+            else:
+                created = self.drive_service.files().create(
+                    body={
+                        'name': self.excel_config['dedup_index_file'],
+                        'parents': [self.excel_config['excel_folder_id']]
+                    },
+                    media_body=media,
+                    fields='id'
+                ).execute()
+                self._dedup_index_file_id = created.get('id')
+            
+            self.log(f"Saved {len(keys)} dedup keys to Drive", "INFO")
+            
+        except Exception as e:
+            self.log(f"Failed to save dedup keys: {str(e)}", "WARNING")
+    
     def _remove_duplicates_by_po_and_item(self, spreadsheet_id: str, sheet_name: str, 
                                          po_number_column: str, item_code_column: str) -> int:
         """Remove duplicates based on PO number AND Item Code combination"""
@@ -557,9 +880,6 @@ class BlinkitHOTScheduler:
             # Create DataFrame
             df = pd.DataFrame(data, columns=headers)
             
-            # Store original count
-            original_count = len(df)
-            
             # Check if required columns exist
             if po_number_column not in df.columns:
                 self.log(f"Cannot remove duplicates: {po_number_column} column not found", "WARNING")
@@ -578,38 +898,27 @@ class BlinkitHOTScheduler:
             df[item_code_column] = df[item_code_column].str.replace(r'\.0$', '', regex=True)
             
             # Remove duplicates based on PO number AND Item Code combination
+            # Hash each (PO, Item) pair once so duplicate detection compares a single uint64 column
+            row_hashes = pd.util.hash_pandas_object(df[[po_number_column, item_code_column]], index=False)
+            
             # Keep first occurrence of each unique (PO, Item) pair
-            df_cleaned = df.drop_duplicates(subset=[po_number_column, item_code_column], keep='first')
+            is_duplicate = row_hashes.duplicated(keep='first')
             
             # Count duplicates removed
-            duplicates_removed = original_count - len(df_cleaned)
+            duplicates_removed = int(is_duplicate.sum())
             
             if duplicates_removed > 0:
                 self.log(f"Removing {duplicates_removed} duplicate rows based on {po_number_column} AND {item_code_column}", "INFO")
                 
                 # Find duplicate combinations
-                duplicate_combinations = df[df.duplicated(subset=[po_number_column, item_code_column], keep=False)]
+                duplicate_combinations = df[row_hashes.duplicated(keep=False)]
                 if len(duplicate_combinations) > 0:
                     sample_duplicates = duplicate_combinations[[po_number_column, item_code_column]].head(5)
                     self.log(f"Sample duplicate combinations: {sample_duplicates.values.tolist()}", "INFO")
                 
-                # Prepare data for update
-                all_values = [headers] + df_cleaned.fillna('').astype(str).values.tolist()
-                
-                # Clear the entire sheet
-                self.sheets_service.spreadsheets().values().clear(
-                    spreadsheetId=spreadsheet_id,
-                    range=f"{sheet_name}!A:Z"
-                ).execute()
-                
-                # Update with deduplicated data
-                body = {'values': all_values}
-                self.sheets_service.spreadsheets().values().update(
-                    spreadsheetId=spreadsheet_id,
-                    range=f"{sheet_name}!A1",
-                    valueInputOption='RAW',  # Use RAW to preserve plain text
-                    body=body
-                ).execute()
+                # Delete only the duplicate rows instead of clearing and rewriting the sheet
+                dropped_rows = df.index[is_duplicate].tolist()
+                self._delete_sheet_rows(spreadsheet_id, sheet_name, dropped_rows)
                 
                 self.log(f"Successfully removed {duplicates_removed} duplicate rows based on {po_number_column} AND {item_code_column}", "SUCCESS")
             else:
@@ -621,101 +930,301 @@ class BlinkitHOTScheduler:
             self.log(f"Failed to remove duplicates by PO and Item: {str(e)}", "ERROR")
             return 0
     
-    def _extract_attachments_from_email_detailed(self, message_id: str, payload: Dict, sender: str, config: dict, base_folder_id: str) -> Dict[str, int]:
-        """Extract attachments from email with detailed tracking"""
-        stats = {'total': 0, 'uploaded': 0, 'skipped': 0, 'failed': 0}
-        
-        if "parts" in payload:
-            for part in payload["parts"]:
-                part_stats = self._extract_attachments_from_email_detailed(
-                    message_id, part, sender, config, base_folder_id
-                )
-                for key in stats:
-                    stats[key] += part_stats[key]
-        elif payload.get("filename") and "attachmentId" in payload.get("body", {}):
-            filename = payload.get("filename", "")
+    def _get_sheet_id(self, spreadsheet_id: str, sheet_name: str) -> int:
+        """Get the numeric sheetId for a tab name (cached per run)"""
+        key = (spreadsheet_id, sheet_name)
+        if key not in self._sheet_ids:
+            result = self.sheets_service.spreadsheets().get(
+                spreadsheetId=spreadsheet_id,
+                fields='sheets.properties(sheetId,title)'
+            ).execute()
+            
+            for sheet in result.get('sheets', []):
+                properties = sheet['properties']
+                self._sheet_ids[(spreadsheet_id, properties['title'])] = properties['sheetId']
+        
+        return self._sheet_ids[key]
+    
+    def _delete_sheet_rows(self, spreadsheet_id: str, sheet_name: str, data_rows: List[int]):
+        """Delete data rows (0-based, excluding the header) with a single batchUpdate"""
+        if not data_rows:
+            return
+        
+        sheet_id = self._get_sheet_id(spreadsheet_id, sheet_name)
+        
+        # Coalesce consecutive rows into [start, end) ranges; +1 skips the header row
+        ranges = []
+        for row in sorted(data_rows):
+            if ranges and ranges[-1][1] == row + 1:
+                ranges[-1][1] = row + 2
+            else:
+                ranges.append([row + 1, row + 2])
+        
+        # Delete from the bottom up so earlier deletions don't shift later indices
+        requests = [
+            {
+                'deleteDimension': {
+                    'range': {
+                        'sheetId': sheet_id,
+                        'dimension': 'ROWS',
+                        'startIndex': start,
+                        'endIndex': end
+                    }
+                }
+            }
+            for start, end in reversed(ranges)
+        ]
+        
+        self.sheets_service.spreadsheets().batchUpdate(
+            spreadsheetId=spreadsheet_id,
+            body={'requests': requests}
+        ).execute()
+    
+    def _get_attachment_folder_id(self, sender: str, config: dict, base_folder_id: str) -> str:
+        """Resolve (creating if needed) the sender/search-term/Excel_Files folder for attachments"""
+        sender_email = sender
+        if "<" in sender_email and ">" in sender_email:
+            sender_email = sender_email.split("<")[1].split(">")[0].strip()
+        sender_folder_name = self._sanitize_filename(sender_email)
+        search_term = config.get('search_term', 'all-attachments')
+        search_folder_name = search_term if search_term else "all-attachments"
+        file_type_folder = "Excel_Files"
+        
+        # Create folders
+        sender_folder_id = self._create_drive_folder(sender_folder_name, base_folder_id)
+        search_folder_id = self._create_drive_folder(search_folder_name, sender_folder_id)
+        return self._create_drive_folder(file_type_folder, search_folder_id)
+    
+    def _find_excel_attachments(self, payload: Dict) -> List[Dict[str, str]]:
+        """Walk a message payload and collect its Excel attachments (filename + attachment id)"""
+        attachments = []
+        
+        # Iterative depth-first walk; parts are pushed in reverse to keep their original order
+        stack = [payload]
+        while stack:
+            part = stack.pop()
+            
+            if "parts" in part:
+                stack.extend(reversed(part["parts"]))
+                continue
+            
+            filename = part.get("filename")
+            if not filename:
+                continue
             
             # Filter for Excel files only
-            if not filename.lower().endswith(('.xls', '.xlsx', '.xlsm')):
-                return stats
+            attachment_id = part.get("body", _EMPTY_BODY).get("attachmentId")
+            if attachment_id and EXCEL_FILENAME_RE.search(filename):
+                attachments.append({
+                    'filename': filename,
+                    'attachment_id': attachment_id
+                })
+        
+        return attachments
+    
+    def _download_and_upload_attachment(self, message_id: str, attachment: Dict[str, str],
+                                        final_filename: str, type_folder_id: str) -> str:
+        """Copy one attachment to Drive; returns 'uploaded', 'skipped' or 'failed'"""
+        try:
+            # Check if file already exists before paying for the download
+            if self._file_exists_in_folder(final_filename, type_folder_id):
+                return 'skipped'
+            
+            # Get attachment data
+            att = self._execute_with_retry(
+                self._thread_service('gmail').users().messages().attachments().get(
+                    userId='me', messageId=message_id, id=attachment['attachment_id'], fields='data'
+                )
+            )
             
-            stats['total'] += 1
+            file_data = base64.urlsafe_b64decode(att["data"].encode("UTF-8"))
+            
+            # Same content already in the folder (e.g. forwarded in another email) - skip the upload.
+            # Drive reports md5Checksum for every uploaded file, so we compare against that.
+            checksum = hashlib.md5(file_data).hexdigest()
+            with self._folder_listing_lock:
+                folder_checksums = self._folder_checksum_cache.setdefault(type_folder_id, set())
+                if checksum in folder_checksums:
+                    # Remember the name, so the existence check skips it next time without a download
+                    self._folder_listing_cache.setdefault(type_folder_id, set()).add(final_filename)
+                    self._content_duplicates.setdefault(type_folder_id, {})[final_filename] = datetime.now().strftime(TIMESTAMP_FORMAT)
+                    self._content_duplicates_changed = True
+                    return 'skipped'
+                folder_checksums.add(checksum)
+            
+            # Upload to Drive
+            try:
+                self._upload_file_to_drive(
+                    file_data, final_filename, type_folder_id,
+                    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+                )
+            except Exception:
+                with self._folder_listing_lock:
+                    folder_checksums.discard(checksum)
+                raise
+            
+            with self._folder_listing_lock:
+                self._folder_listing_cache.setdefault(type_folder_id, set()).add(final_filename)
+            
+            return 'uploaded'
+            
+        except Exception as e:
+            self.log(f"Failed to process attachment {attachment['filename']}: {str(e)}", "ERROR")
+            return 'failed'
+    
+    def _load_content_duplicates(self, base_folder_id: str):
+        """Load names of attachments previously skipped as same-content copies, and treat them as existing"""
+        try:
+            index_file = self._find_drive_file(self.gmail_config['content_duplicates_file'], base_folder_id)
+            if not index_file:
+                return
+            
+            self._content_duplicates_file_id = index_file['id']
+            index = json.loads(self._download_drive_file(index_file['id']))
+            
+            with self._folder_listing_lock:
+                for folder_id, names in index.items():
+                    self._content_duplicates.setdefault(folder_id, {}).update(names)
+                    self._folder_listing_cache.setdefault(folder_id, set()).update(names)
+            
+        except Exception as e:
+            self.log(f"Failed to load skipped duplicate attachments: {str(e)}", "WARNING")
+    
+    def _save_content_duplicates(self, base_folder_id: str):
+        """Persist names of attachments skipped as same-content copies for the next run"""
+        # Messages older than the search window are never fetched again, so their entries can go
+        cutoff = (datetime.now() - timedelta(days=self.gmail_config['days_back'])).strftime(TIMESTAMP_FORMAT)
+        index = {}
+        pruned = False
+        for folder_id, names in self._content_duplicates.items():
+            recent = {name: skipped_at for name, skipped_at in names.items() if skipped_at >= cutoff}
+            pruned = pruned or len(recent) < len(names)
+            if recent:
+                index[folder_id] = recent
+        
+        if not (self._content_duplicates_changed or pruned):
+            return
+        
+        try:
+            media = MediaIoBaseUpload(
+                io.BytesIO(json.dumps(index).encode('utf-8')),
+                mimetype='application/json'
+            )
+            
+            if self._content_duplicates_file_id:
+                self._execute_with_retry(self.drive_service.files().update(
+                    fileId=self._content_duplicates_file_id,
+                    media_body=media,
+                    fields='id'
+                ))
+            else:
+                created = self._execute_with_retry(self.drive_service.files().create(
+                    body={
+                        'name': self.gmail_config['content_duplicates_file'],
+                        'parents': [base_folder_id]
+                    },
+                    media_body=media,
+                    fields='id'
+                ))
+                self._content_duplicates_file_id = created.get('id')
+            
+            self._content_duplicates_changed = False
             
+        except Exception as e:
+            self.log(f"Failed to save skipped duplicate attachments: {str(e)}", "WARNING")
+    
+    def _execute_with_retry(self, request, max_attempts: int = 5):
+        """Execute an API request, backing off on rate-limit and transient server errors"""
+        for attempt in range(max_attempts):
             try:
-                # Get attachment data
-                attachment_id = payload["body"].get("attachmentId")
-                att = self.gmail_service.users().messages().attachments().get(
-                    userId='me', messageId=message_id, id=attachment_id
-                ).execute()
-                
-                file_data = base64.urlsafe_b64decode(att["data"].encode("UTF-8"))
-                
-                # Create nested folder structure
-                sender_email = sender
-                if "<" in sender_email and ">" in sender_email:
-                    sender_email = sender_email.split("<")[1].split(">")[0].strip()
-                sender_folder_name = self._sanitize_filename(sender_email)
-                search_term = config.get('search_term', 'all-attachments')
-                search_folder_name = search_term if search_term else "all-attachments"
-                file_type_folder = "Excel_Files"
-                
-                # Create folders
-                sender_folder_id = self._create_drive_folder(sender_folder_name, base_folder_id)
-                search_folder_id = self._create_drive_folder(search_folder_name, sender_folder_id)
-                type_folder_id = self._create_drive_folder(file_type_folder, search_folder_id)
-                
-                # Clean filename and make it unique
-                clean_filename = self._sanitize_filename(filename)
-                final_filename = f"{message_id}_{clean_filename}"
+                return request.execute()
+            except HttpError as e:
+                if not self._is_retryable_error(e) or attempt == max_attempts - 1:
+                    raise
                 
-                # Check if file already exists
-                if not self._file_exists_in_folder(final_filename, type_folder_id):
-                    # Upload to Drive
-                    file_metadata = {
-                        'name': final_filename,
-                        'parents': [type_folder_id]
-                    }
-                    
-                    media = MediaIoBaseUpload(
-                        io.BytesIO(file_data),
-                        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                    )
-                    
-                    self.drive_service.files().create(
-                        body=file_metadata,
-                        media_body=media,
-                        fields='id'
-                    ).execute()
-                    
-                    stats['uploaded'] += 1
+                # Honour the server's Retry-After when given, else exponential backoff with jitter
+                retry_after = e.resp.get('retry-after', '')
+                if retry_after.isdigit():
+                    delay = min(64, float(retry_after))
                 else:
-                    stats['skipped'] += 1
-                    
-            except Exception as e:
-                stats['failed'] += 1
-                self.log(f"Failed to process attachment {filename}: {str(e)}", "ERROR")
+                    delay = min(64, 2 ** attempt) + random.random()
+                time.sleep(delay)
+    
+    @staticmethod
+    def _is_retryable_error(error: HttpError) -> bool:
+        """Rate-limit (429, or 403 with a rate-limit reason) and transient server errors are worth retrying"""
+        status = error.resp.status
+        if status in (429, 500, 502, 503, 504):
+            return True
+        if status == 403:
+            try:
+                body = json.loads(error.content)['error']
+            except (ValueError, TypeError, KeyError):
+                return False
+            if not isinstance(body, dict):
+                return False
+            
+            reasons = set()
+            for key in ('errors', 'details'):
+                entries = body.get(key)
+                if isinstance(entries, list):
+                    reasons.update(str(entry.get('reason', '')).lower() for entry in entries if isinstance(entry, dict))
+            return bool(reasons & RATE_LIMIT_REASONS)
+        return False
+    
+    def _upload_file_to_drive(self, file_data: bytes, filename: str, folder_id: str, mimetype: str) -> str:
+        """Upload bytes to a Drive folder, using a resumable session only for large files"""
+        file_metadata = {
+            'name': filename,
+            'parents': [folder_id]
+        }
         
-        return stats
+        # Small files go up in a single multipart request; resumable sessions cost an extra round trip
+        resumable = len(file_data) > self.gmail_config['resumable_threshold_bytes']
+        media = MediaIoBaseUpload(
+            io.BytesIO(file_data),
+            mimetype=mimetype,
+            chunksize=self.gmail_config['upload_chunk_bytes'],
+            resumable=resumable
+        )
+        
+        request = self._thread_service('drive').files().create(
+            body=file_metadata,
+            media_body=media,
+            fields='id'
+        )
+        
+        if not resumable:
+            uploaded = self._execute_with_retry(request)
+        else:
+            # Stream in chunks; a transient failure only resends the current chunk
+            uploaded = None
+            while uploaded is None:
+                status, uploaded = request.next_chunk(num_retries=5)
+        
+        return uploaded.get('id')
     
     def _send_summary_email(self, summary_data: Dict):
         """Send summary email with workflow results - Fixed version"""
         try:
             self.log("Preparing to send summary email...", "INFO")
             
-            # Get user's email address
-            profile = self.gmail_service.users().getProfile(userId='me').execute()
-            user_email = profile['emailAddress']
+            # Get user's email address (already fetched while authenticating)
+            user_email = self.user_email
+            if not user_email:
+                profile = self.gmail_service.users().getProfile(userId='me', fields='emailAddress').execute()
+                user_email = profile['emailAddress']
             self.log(f"Sending email from: {user_email}", "INFO")
             
             # Prepare email content
-            subject = f"{self.email_config['subject_prefix']} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            subject = f"{self.email_config['subject_prefix']} - {datetime.now().strftime(TIMESTAMP_FORMAT)}"
             
             # Build email body with proper formatting
             body_lines = [
                 "Blinkit HOT Automation Workflow Summary",
                 "=" * 40,
-                f"Workflow Start: {summary_data['workflow_start'].strftime('%Y-%m-%d %H:%M:%S')}",
-                f"Workflow End: {summary_data['workflow_end'].strftime('%Y-%m-%d %H:%M:%S')}",
+                f"Workflow Start: {summary_data['workflow_start'].strftime(TIMESTAMP_FORMAT)}",
+                f"Workflow End: {summary_data['workflow_end'].strftime(TIMESTAMP_FORMAT)}",
                 f"Days Back Parameter: {self.gmail_config['days_back']} days",
                 "",
                 "MAIL TO DRIVE WORKFLOW:",
@@ -744,23 +1253,22 @@ class BlinkitHOTScheduler:
                 "This is an automated email from Blinkit HOT Automation Scheduler."
             ]
             
-            body = "\n".join(body_lines)
-            
-            # Create email message with proper formatting
-            message = f"Subject: {subject}\n"
-            message += f"To: {self.email_config['recipient']}\n"
-            message += f"From: {user_email}\n"
-            message += f"Cc: {user_email}\n"
-            message += "Content-Type: text/plain; charset=\"UTF-8\"\n\n"
-            message += body
+            # Create email message (headers and CRLF line endings are handled by EmailMessage)
+            message = EmailMessage()
+            message['Subject'] = subject
+            message['To'] = self.email_config['recipient']
+            message['From'] = user_email
+            message['Cc'] = user_email
+            message.set_content("\n".join(body_lines))
             
             # Encode message
-            raw_message = base64.urlsafe_b64encode(message.encode('utf-8')).decode('utf-8')
+            raw_message = base64.urlsafe_b64encode(message.as_bytes(policy=SMTP)).decode('ascii')
             
             # Send email
             send_result = self.gmail_service.users().messages().send(
                 userId='me',
-                body={'raw': raw_message}
+                body={'raw': raw_message},
+                fields='id'
             ).execute()
             
             self.log(f"Summary email sent to {self.email_config['recipient']} and CC'd to {user_email}", "SUCCESS")
@@ -839,52 +1347,75 @@ class BlinkitHOTScheduler:
         return summary_data['overall_success']
     
     # Helper methods
-    def _append_to_sheet_with_source(self, spreadsheet_id: str, sheet_name: str, df: pd.DataFrame, 
-                                    source_file_column: str, include_headers: bool):
-        """Append DataFrame to Google Sheet with source file column - using RAW to preserve text"""
+    def _append_to_sheet_with_source(self, spreadsheet_id: str, sheet_name: str, frames: List[pd.DataFrame], 
+                                    source_file_column: str, include_headers: bool) -> int:
+        """Append DataFrames to Google Sheet with source file column - using RAW to preserve text.
+        Returns the number of data rows written, which is short of the total if a chunk failed."""
         try:
-            # Make sure source file column is the last column
-            columns = [col for col in df.columns if col != source_file_column] + [source_file_column]
-            df = df[columns]
-            
-            # Convert DataFrame to values
-            if include_headers:
-                # Include headers
-                values = [df.columns.tolist()] + df.fillna('').astype(str).values.tolist()
-            else:
-                # Skip headers
-                values = df.fillna('').astype(str).values.tolist()
+            # Each frame is converted on its own, so every file keeps its own column positions and dtypes
+            # (headers, when written, come from the first frame)
+            values = []
+            for index, df in enumerate(frames):
+                # Make sure source file column is the last column
+                columns = [col for col in df.columns if col != source_file_column] + [source_file_column]
+                df = df.reindex(columns=columns, copy=False)
+                
+                # Convert DataFrame to strings (fillna first, so output matches what the sheet has always received)
+                cell_values = df.fillna('').astype(str).to_numpy(dtype=object)
+                
+                if include_headers and index == 0:
+                    values.append(columns)
+                values.extend(cell_values.tolist())
             
             if not values:
                 self.log("No data to append", "WARNING")
-                return
+                return 0
             
-            # Prepare the request body
-            body = {
-                'values': values
-            }
+            header_rows = 1 if include_headers else 0
             
-            # Append data to the sheet - Use RAW to preserve plain text
-            result = self.sheets_service.spreadsheets().values().append(
-                spreadsheetId=spreadsheet_id,
-                range=f"{sheet_name}!A:A",
-                valueInputOption='RAW',  # Use RAW to preserve text
-                insertDataOption='INSERT_ROWS',
-                body=body
-            ).execute()
+            # Append in chunks to stay well under the Sheets request payload limit.
+            # Chunks are sent sequentially so rows (and headers) keep their order.
+            chunk_rows = self.excel_config['append_chunk_rows']
+            rows_sent = 0
             
-            self.log(f"Appended {len(values)} rows to Google Sheet with source file tracking", "INFO")
+            try:
+                for start in range(0, len(values), chunk_rows):
+                    body = {
+                        'values': values[start:start + chunk_rows]
+                    }
+                    
+                    # Append data to the sheet - Use RAW to preserve plain text
+                    self.sheets_service.spreadsheets().values().append(
+                        spreadsheetId=spreadsheet_id,
+                        range=f"{sheet_name}!A:A",
+                        valueInputOption='RAW',  # Use RAW to preserve text
+                        insertDataOption='INSERT_ROWS',
+                        body=body,
+                        fields='updates/updatedRows'
+                    ).execute()
+                    
+                    rows_sent = start + len(body['values'])
+                    self._sheet_nonempty.add((spreadsheet_id, sheet_name))
+            except Exception as e:
+                # Earlier chunks are already in the sheet - report how far we got
+                self.log(f"Failed to append to Google Sheet after {max(rows_sent - header_rows, 0)} rows: {str(e)}", "ERROR")
+            
+            rows_appended = max(rows_sent - header_rows, 0)
+            if rows_sent == len(values):
+                self.log(f"Appended {rows_appended} rows to Google Sheet with source file tracking", "INFO")
+            return rows_appended
             
         except Exception as e:
             self.log(f"Failed to append to Google Sheet: {str(e)}", "ERROR")
+            return 0
 
     def _log_summary_to_sheet(self, summary_data: Dict):
         """Log workflow summary to Google Sheet"""
         try:
             # Prepare summary row
             summary_row = [
-                summary_data['workflow_start'].strftime("%Y-%m-%d %H:%M:%S"),
-                summary_data['workflow_end'].strftime("%Y-%m-%d %H:%M:%S"),
+                summary_data['workflow_start'].strftime(TIMESTAMP_FORMAT),
+                summary_data['workflow_end'].strftime(TIMESTAMP_FORMAT),
                 summary_data['duration_minutes'],
                 summary_data['emails_checked'],
                 summary_data['attachments_found'],
@@ -901,17 +1432,22 @@ class BlinkitHOTScheduler:
                 "SUCCESS" if summary_data['overall_success'] else "FAILED"
             ]
             
-            # Check if summary sheet exists and has headers
+            sheet_key = (self.summary_config['spreadsheet_id'], self.summary_config['sheet_name'])
+            
+            # Check if summary sheet exists and has headers (skip the probe if already known)
             try:
-                result = self.sheets_service.spreadsheets().values().get(
-                    spreadsheetId=self.summary_config['spreadsheet_id'],
-                    range=f"{self.summary_config['sheet_name']}!A:A"
-                ).execute()
-                
-                values = result.get('values', [])
+                if sheet_key in self._sheet_nonempty:
+                    has_headers = True
+                else:
+                    # Only the header cell matters, not the whole (ever-growing) log column
+                    result = self.sheets_service.spreadsheets().values().get(
+                        spreadsheetId=self.summary_config['spreadsheet_id'],
+                        range=f"{self.summary_config['sheet_name']}!A1"
+                    ).execute()
+                    has_headers = bool(result.get('values', []))
                 
                 # If no headers exist, add them
-                if not values:
+                if not has_headers:
                     headers = [
                         "Workflow Start", "Workflow End", "Duration (min)", "Emails Checked", 
                         "Attachments Found", "Attachments Skipped", "Attachments Uploaded",
@@ -937,6 +1473,7 @@ class BlinkitHOTScheduler:
                         body=body
                     ).execute()
                 
+                self._sheet_nonempty.add(sheet_key)
                 self.log("Workflow summary logged to Google Sheet", "INFO")
                 
             except HttpError as e:
@@ -958,6 +1495,7 @@ class BlinkitHOTScheduler:
                         valueInputOption='RAW',
                         body=body
                     ).execute()
+                    self._sheet_nonempty.add(sheet_key)
                     self.log("Created summary sheet and logged workflow data", "INFO")
                 else:
                     raise e
@@ -965,49 +1503,154 @@ class BlinkitHOTScheduler:
         except Exception as e:
             self.log(f"Failed to log summary to sheet: {str(e)}", "ERROR")
 
-    def _get_existing_source_files(self, spreadsheet_id: str, sheet_name: str, source_file_column: str) -> List[str]:
-        """Get list of existing source files from Google Sheet"""
+    def _get_processed_manifest(self, spreadsheet_id: str, sheet_name: str,
+                                source_file_column: str) -> Tuple[Set[str], Set[str], bool]:
+        """Get processed source files (names and content checksums) from the manifest tab and whether
+        the data sheet has rows, in one read"""
+        manifest_sheet = self.excel_config['manifest_sheet_name']
+        ranges = [f"{manifest_sheet}!A:B", f"{sheet_name}!A1:A2"]
+        
+        # When the summary log lives in the same spreadsheet, probe its header cell in the same read
+        summary_key = (self.summary_config['spreadsheet_id'], self.summary_config['sheet_name'])
+        summary_range = f"{summary_key[1]}!A1"
+        if summary_key[0] == spreadsheet_id and summary_key not in self._sheet_nonempty:
+            ranges.append(summary_range)
+        
+        while True:
+            try:
+                result = self.sheets_service.spreadsheets().values().batchGet(
+                    spreadsheetId=spreadsheet_id,
+                    ranges=ranges
+                ).execute()
+                
+                value_ranges = [vr.get('values', []) for vr in result.get('valueRanges', [])]
+                manifest_values, data_values = value_ranges[:2]
+                
+                sheet_has_data = len(data_values) > 1
+                if sheet_has_data:
+                    self._sheet_nonempty.add((spreadsheet_id, sheet_name))
+                if len(value_ranges) > 2 and value_ranges[2]:
+                    self._sheet_nonempty.add(summary_key)
+                
+                return (
+                    {row[0] for row in manifest_values if row and row[0]},
+                    {row[1] for row in manifest_values if len(row) > 1 and row[1]},
+                    sheet_has_data
+                )
+                
+            except HttpError as e:
+                if "Unable to parse range" not in str(e):
+                    raise
+                if summary_range in ranges and summary_key[1] in str(e):
+                    # Summary tab doesn't exist yet (_log_summary_to_sheet creates it) - read without it
+                    ranges.remove(summary_range)
+                    continue
+                break
+        
+        # Manifest tab doesn't exist yet - seed it from the source file column of the data sheet
+        self.log(f"Creating manifest sheet {manifest_sheet} from existing source files...", "INFO")
+        existing_source_files = self._get_existing_source_files(spreadsheet_id, sheet_name, source_file_column)
+        self._ensure_sheet_tab(spreadsheet_id, manifest_sheet)
+        self._append_to_manifest(spreadsheet_id, [(name, '') for name in sorted(existing_source_files)])
+        
+        return existing_source_files, set(), self._check_sheet_has_data(spreadsheet_id, sheet_name)
+    
+    def _append_to_manifest(self, spreadsheet_id: str, files: List[Tuple[str, str]]):
+        """Record processed source files as (name, Drive md5 checksum or '') rows in the manifest tab"""
+        if not files:
+            return
+        
+        try:
+            self.sheets_service.spreadsheets().values().append(
+                spreadsheetId=spreadsheet_id,
+                range=f"{self.excel_config['manifest_sheet_name']}!A:B",
+                valueInputOption='RAW',
+                insertDataOption='INSERT_ROWS',
+                body={'values': [[name, checksum] for name, checksum in files]}
+            ).execute()
+        except Exception as e:
+            self.log(f"Failed to update processed files manifest: {str(e)}", "ERROR")
+    
+    def _ensure_sheet_tab(self, spreadsheet_id: str, sheet_name: str):
+        """Create a tab in the spreadsheet if it doesn't exist"""
+        try:
+            self._get_sheet_id(spreadsheet_id, sheet_name)
+            return
+        except KeyError:
+            pass
+        
+        result = self.sheets_service.spreadsheets().batchUpdate(
+            spreadsheetId=spreadsheet_id,
+            body={'requests': [{'addSheet': {'properties': {'title': sheet_name}}}]}
+        ).execute()
+        
+        properties = result['replies'][0]['addSheet']['properties']
+        self._sheet_ids[(spreadsheet_id, properties['title'])] = properties['sheetId']
+    
+    @staticmethod
+    def _column_letter(index: int) -> str:
+        """Convert a zero-based column index to its A1 letter (0 -> A, 26 -> AA)"""
+        letters = ""
+        index += 1
+        while index:
+            index, remainder = divmod(index - 1, 26)
+            letters = chr(ord('A') + remainder) + letters
+        return letters
+    
+    @staticmethod
+    def _column_index(cell_ref: str) -> int:
+        """Convert an A1 cell reference to its zero-based column index (B7 -> 1, AA1 -> 26)"""
+        index = 0
+        for char in cell_ref:
+            if not char.isalpha():
+                break
+            index = index * 26 + (ord(char.upper()) - ord('A') + 1)
+        return index - 1
+    
+    def _get_existing_source_files(self, spreadsheet_id: str, sheet_name: str, source_file_column: str) -> Set[str]:
+        """Get the set of existing source files from Google Sheet"""
         try:
-            # First, check if the sheet exists and has data
+            # Locate the source file column from the header row only
             result = self.sheets_service.spreadsheets().values().get(
                 spreadsheetId=spreadsheet_id,
-                range=f"{sheet_name}!A:Z"
+                range=f"{sheet_name}!1:1"
             ).execute()
             
             values = result.get('values', [])
-            
-            if not values or len(values) <= 1:
-                return []
-            
-            # Find the column index for source file
-            headers = values[0]
+            headers = values[0] if values else []
             try:
                 source_col_index = headers.index(source_file_column)
             except ValueError:
                 # Source file column doesn't exist yet
-                return []
+                return set()
             
-            # Extract all source files from the column (skip header)
-            source_files = []
-            for row in values[1:]:
-                if len(row) > source_col_index and row[source_col_index]:
-                    source_files.append(row[source_col_index])
+            # Then fetch just that column
+            column = self._column_letter(source_col_index)
+            result = self.sheets_service.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id,
+                range=f"{sheet_name}!{column}2:{column}",
+                majorDimension='COLUMNS'
+            ).execute()
             
-            return list(set(source_files))  # Return unique source files
+            values = result.get('values', [])
+            return {name for name in values[0] if name} if values else set()
             
         except HttpError as e:
             # Sheet might not exist
             if "Unable to parse range" in str(e):
-                return []
+                return set()
             else:
                 self.log(f"Failed to get existing source files: {str(e)}", "ERROR")
-                return []
+                return set()
         except Exception as e:
             self.log(f"Failed to get existing source files: {str(e)}", "ERROR")
-            return []
+            return set()
     
     def _check_sheet_has_data(self, spreadsheet_id: str, sheet_name: str) -> bool:
         """Check if the sheet already has data (more than just headers)"""
+        if (spreadsheet_id, sheet_name) in self._sheet_nonempty:
+            return True
+        
         try:
             result = self.sheets_service.spreadsheets().values().get(
                 spreadsheetId=spreadsheet_id,
@@ -1016,46 +1659,103 @@ class BlinkitHOTScheduler:
             
             values = result.get('values', [])
             # Consider sheet has data if there are more than 1 row (header + at least one data row)
-            return len(values) > 1
+            if len(values) > 1:
+                self._sheet_nonempty.add((spreadsheet_id, sheet_name))
+                return True
+            return False
             
         except Exception as e:
             self.log(f"Failed to check if sheet has data: {str(e)}", "WARNING")
             return False
 
-    def _get_email_details(self, message_id: str) -> Dict:
-        """Get email details including sender and subject"""
-        try:
-            message = self.gmail_service.users().messages().get(
-                userId='me', id=message_id, format='metadata'
-            ).execute()
-            
-            headers = message['payload'].get('headers', [])
+    def _get_messages_batch(self, message_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch full Gmail messages using batched HTTP requests"""
+        messages = {}
+        throttled = []
+        
+        def on_message(request_id, response, exception):
+            if exception is None:
+                messages[request_id] = response
+            elif isinstance(exception, HttpError) and self._is_retryable_error(exception):
+                # Gmail often throttles some calls of a batch - fetch them again in a later batch
+                throttled.append(request_id)
+            else:
+                self.log(f"Failed to fetch email {request_id}: {str(exception)}", "ERROR")
+        
+        batch_size = self.gmail_config['batch_size']
+        max_attempts = 5
+        pending = list(message_ids)
+        
+        for attempt in range(max_attempts):
+            for start in range(0, len(pending), batch_size):
+                batch_ids = pending[start:start + batch_size]
+                batch = self.gmail_service.new_batch_http_request(callback=on_message)
+                for message_id in batch_ids:
+                    batch.add(
+                        self.gmail_service.users().messages().get(
+                            userId='me', id=message_id, format='full', fields=MESSAGE_FIELDS
+                        ),
+                        request_id=message_id
+                    )
+                
+                try:
+                    batch.execute()
+                except HttpError as e:
+                    if self._is_retryable_error(e):
+                        # The whole batch request was throttled or hit a server error - fetch its emails again
+                        throttled.extend(mid for mid in batch_ids if mid not in messages and mid not in throttled)
+                    else:
+                        self.log(f"Batch fetch of emails failed: {str(e)}", "ERROR")
+                except OSError as e:
+                    # Connection failures and timeouts are transient as well
+                    self.log(f"Batch fetch of emails failed, will retry: {str(e)}", "WARNING")
+                    throttled.extend(mid for mid in batch_ids if mid not in messages and mid not in throttled)
+                except Exception as e:
+                    self.log(f"Batch fetch of emails failed: {str(e)}", "ERROR")
             
-            details = {
-                'id': message_id,
-                'sender': next((h['value'] for h in headers if h['name'] == "From"), "Unknown"),
-                'subject': next((h['value'] for h in headers if h['name'] == "Subject"), "(No Subject)"),
-                'date': next((h['value'] for h in headers if h['name'] == "Date"), "")
-            }
+            if not throttled:
+                break
             
-            return details
+            pending, throttled = throttled, []
+            if attempt == max_attempts - 1:
+                self.log(f"Giving up on {len(pending)} emails still failing after {max_attempts} attempts", "ERROR")
+                break
             
-        except Exception as e:
-            self.log(f"Failed to get email details for {message_id}: {str(e)}", "ERROR")
-            return {'id': message_id, 'sender': 'Unknown', 'subject': 'Unknown', 'date': ''}
+            self.log(f"Retrying {len(pending)} rate-limited or failed email fetches", "WARNING")
+            time.sleep(min(64, 2 ** attempt) + random.random())
+        
+        return messages
+    
+    def _extract_email_details(self, message_id: str, message: Dict) -> Dict:
+        """Extract sender, subject and date from a fetched message's headers"""
+        headers = {h['name']: h['value'] for h in message.get('payload', {}).get('headers', [])}
+        
+        return {
+            'id': message_id,
+            'sender': headers.get("From", "Unknown"),
+            'subject': headers.get("Subject", "(No Subject)"),
+            'date': headers.get("Date", "")
+        }
     
     def _create_drive_folder(self, folder_name: str, parent_folder_id: Optional[str] = None) -> str:
         """Create a folder in Google Drive"""
+        cache_key = (folder_name, parent_folder_id or '')
+        if cache_key in self._folder_cache:
+            return self._folder_cache[cache_key]
+        
         try:
             # Check if folder already exists
-            query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
+            query = f"name='{self._escape_query_value(folder_name)}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
             if parent_folder_id:
                 query += f" and '{parent_folder_id}' in parents"
             
-            existing = self.drive_service.files().list(q=query, fields='files(id, name)').execute()
+            existing = self._execute_with_retry(
+                self._thread_service('drive').files().list(q=query, fields='files(id)', pageSize=1)
+            )
             files = existing.get('files', [])
             
             if files:
+                self._folder_cache[cache_key] = files[0]['id']
                 return files[0]['id']
             
             # Create new folder
@@ -1067,11 +1767,14 @@ class BlinkitHOTScheduler:
             if parent_folder_id:
                 folder_metadata['parents'] = [parent_folder_id]
             
-            folder = self.drive_service.files().create(
-                body=folder_metadata,
-                fields='id'
-            ).execute()
+            folder = self._execute_with_retry(
+                self._thread_service('drive').files().create(
+                    body=folder_metadata,
+                    fields='id'
+                )
+            )
             
+            self._folder_cache[cache_key] = folder.get('id')
             return folder.get('id')
             
         except Exception as e:
@@ -1080,24 +1783,66 @@ class BlinkitHOTScheduler:
     
     def _sanitize_filename(self, filename: str) -> str:
         """Clean up filenames to be safe for all operating systems"""
-        cleaned = re.sub(r'[<>:"/\\|?*]', '_', filename)
+        cleaned = filename.translate(_UNSAFE_FILENAME_TABLE)
         if len(cleaned) > 100:
-            name_parts = cleaned.split('.')
-            if len(name_parts) > 1:
-                extension = name_parts[-1]
-                base_name = '.'.join(name_parts[:-1])
+            base_name, dot, extension = cleaned.rpartition('.')
+            if dot:
                 cleaned = f"{base_name[:95]}.{extension}"
             else:
                 cleaned = cleaned[:100]
         return cleaned
     
+    @staticmethod
+    def _escape_query_value(value: str) -> str:
+        """Escape a string for use inside a quoted Drive query literal"""
+        return value.replace("\\", "\\\\").replace("'", "\\'")
+    
+    def _find_drive_file(self, filename: str, folder_id: str) -> Optional[Dict]:
+        """Find a file by name in a Drive folder"""
+        query = f"name='{self._escape_query_value(filename)}' and '{folder_id}' in parents and trashed=false"
+        existing = self.drive_service.files().list(q=query, fields='files(id, name)', pageSize=1).execute()
+        files = existing.get('files', [])
+        return files[0] if files else None
+    
+    def _list_folder_names(self, folder_id: str) -> Set[str]:
+        """List file names (and content checksums) in a Drive folder once per run; later lookups hit the cache"""
+        with self._folder_listing_lock:
+            if folder_id in self._folder_listed:
+                return self._folder_listing_cache[folder_id]
+        
+        # The listing runs outside the lock so different folders can be listed concurrently
+        names = set()
+        checksums = set()
+        page_token = None
+        while True:
+            result = self._execute_with_retry(
+                self._thread_service('drive').files().list(
+                    q=f"'{folder_id}' in parents and trashed=false",
+                    fields='nextPageToken, files(name, md5Checksum)',
+                    pageSize=1000,
+                    pageToken=page_token
+                )
+            )
+            for f in result.get('files', []):
+                names.add(f['name'])
+                if f.get('md5Checksum'):
+                    checksums.add(f['md5Checksum'])
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                break
+        
+        # Merge rather than overwrite, so files uploaded meanwhile by other threads are kept
+        with self._folder_listing_lock:
+            cached = self._folder_listing_cache.setdefault(folder_id, set())
+            cached.update(names)
+            self._folder_checksum_cache.setdefault(folder_id, set()).update(checksums)
+            self._folder_listed.add(folder_id)
+            return cached
+    
     def _file_exists_in_folder(self, filename: str, folder_id: str) -> bool:
         """Check if file already exists in folder"""
         try:
-            query = f"name='{filename}' and '{folder_id}' in parents and trashed=false"
-            existing = self.drive_service.files().list(q=query, fields='files(id, name)').execute()
-            files = existing.get('files', [])
-            return len(files) > 0
+            return filename in self._list_folder_names(folder_id)
         except Exception as e:
             self.log(f"Failed to check file existence: {str(e)}", "ERROR")
             return False
@@ -1107,54 +1852,161 @@ class BlinkitHOTScheduler:
         try:
             start_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%dT00:00:00')
             query = f"'{folder_id}' in parents and (mimeType='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' or mimeType='application/vnd.ms-excel') and name contains 'GRN' and trashed=false and modifiedTime > '{start_date}'"
-            results = self.drive_service.files().list(
-                q=query,
-                pageSize=max_results,
-                fields="files(id, name, mimeType)",
-                orderBy="modifiedTime desc"
-            ).execute()
             
-            files = results.get('files', [])
+            # Drive caps a page at 1000 files, so keep paging until max_results is reached
+            files = []
+            page_token = None
+            while len(files) < max_results:
+                results = self._execute_with_retry(
+                    self.drive_service.files().list(
+                        q=query,
+                        pageSize=min(max_results - len(files), 1000),
+                        fields="nextPageToken, files(id, name, md5Checksum)",
+                        orderBy="modifiedTime desc",
+                        pageToken=page_token
+                    )
+                )
+                
+                files.extend(results.get('files', []))
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    break
+            
             return files
             
         except Exception as e:
             self.log(f"Failed to get Excel files: {str(e)}", "ERROR")
             return []
     
-    def _read_excel_file(self, file_id: str, filename: str, header_row: int) -> pd.DataFrame:
-        """Read Excel file from Drive with robust parsing"""
-        try:
-            # Download file content
-            request = self.drive_service.files().get_media(fileId=file_id)
-            file_stream = io.BytesIO()
-            downloader = MediaIoBaseDownload(file_stream, request)
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
-            
-            file_stream.seek(0)
-            
-            # Attempt to read with pandas
+    def _authorized_http(self) -> AuthorizedHttp:
+        """Get the authorized HTTP transport shared by the current thread's service clients"""
+        # httplib2 connections aren't thread-safe, so each thread keeps its own kept-alive transport
+        http = getattr(self._thread_local, 'http', None)
+        if http is None:
+            # build_http() sets googleapiclient's default timeout and leaves 308 to the resumable upload logic
+            http = AuthorizedHttp(self.creds, http=build_http())
+            self._thread_local.http = http
+        return http
+    
+    def _build_service(self, api: str, **kwargs):
+        """Build a service client from the discovery documents bundled with googleapiclient"""
+        versions = {'gmail': 'v1', 'drive': 'v3', 'sheets': 'v4'}
+        return build(api, versions[api], http=self._authorized_http(),
+                     static_discovery=True, cache_discovery=False, **kwargs)
+    
+    def _thread_service(self, api: str):
+        """Get a service client for api ('gmail', 'drive' or 'sheets') bound to the current thread"""
+        if threading.current_thread() is threading.main_thread():
+            return getattr(self, f'{api}_service')
+        
+        service = getattr(self._thread_local, api, None)
+        if service is None:
+            service = self._build_service(api)
+            setattr(self._thread_local, api, service)
+        return service
+    
+    def _read_excel_files_concurrently(self, files: List[Dict], header_row: int):
+        """Download and parse Excel files in parallel, yielding (file, DataFrame) in input order"""
+        max_workers = self.excel_config['read_workers']
+        file_iter = iter(files)
+        pending = deque()
+        
+        # Downloads run on threads (I/O bound); parsing is CPU bound, so it goes to worker processes.
+        # Workers are spawned rather than forked since download threads are already running.
+        # For one or two files, spawning workers costs more than it saves, so those parse in-process.
+        with ThreadPoolExecutor(max_workers=max_workers) as executor, ExitStack() as stack:
+            parse_pool = None
+            if len(files) > 2:
+                parse_pool = stack.enter_context(ProcessPoolExecutor(
+                    max_workers=self.excel_config['parse_processes'],
+                    mp_context=multiprocessing.get_context('spawn')
+                ))
+            
+            def submit_next():
+                file = next(file_iter, None)
+                if file is not None:
+                    future = executor.submit(self._read_excel_file, file['id'], file['name'], header_row, parse_pool)
+                    pending.append((file, future))
+            
+            # Keep a bounded window in flight so we never hold every file in memory
+            for _ in range(max_workers * 2):
+                submit_next()
+            
+            while pending:
+                file, future = pending.popleft()
+                df = future.result()
+                submit_next()
+                yield file, df
+    
+    def _download_drive_file(self, file_id: str) -> bytes:
+        """Download file content from Drive"""
+        request = self._thread_service('drive').files().get_media(fileId=file_id)
+        file_stream = io.BytesIO()
+        # Large chunks so typical GRN workbooks come down in a single request
+        downloader = MediaIoBaseDownload(file_stream, request, chunksize=self.excel_config['download_chunk_bytes'])
+        done = False
+        while not done:
+            status, done = downloader.next_chunk(num_retries=5)
+        
+        return file_stream.getvalue()
+    
+    def _parse_excel_file(self, file_data: bytes, filename: str, header_row: int) -> pd.DataFrame:
+        """Parse downloaded Excel bytes with robust fallbacks"""
+        file_stream = io.BytesIO(file_data)
+        
+        # Attempt to read with pandas - Rust-based calamine first, then the default engine
+        for engine in EXCEL_ENGINES:
             try:
+                file_stream.seek(0)
                 if header_row == -1:
-                    df = pd.read_excel(file_stream, header=None)
+                    df = pd.read_excel(file_stream, header=None, engine=engine)
                 else:
-                    df = pd.read_excel(file_stream, header=header_row)
+                    df = pd.read_excel(file_stream, header=header_row, engine=engine)
                 return self._clean_dataframe(df)
             except Exception as e:
-                self.log(f"Standard read failed: {str(e)[:50]}...", "WARNING")
+                self.log(f"Standard read failed ({engine or 'default'} engine): {str(e)[:50]}...", "WARNING")
+        
+        # Fallback: raw XML extraction for corrupted files
+        df = self._try_raw_xml_extraction(file_stream, filename, header_row)
+        if not df.empty:
+            return self._clean_dataframe(df)
+        
+        return pd.DataFrame()
+    
+    def _read_excel_file(self, file_id: str, filename: str, header_row: int,
+                         parse_pool: Optional[ProcessPoolExecutor] = None) -> pd.DataFrame:
+        """Read Excel file from Drive with robust parsing"""
+        try:
+            file_data = self._download_drive_file(file_id)
             
-            # Fallback: raw XML extraction for corrupted files
-            df = self._try_raw_xml_extraction(file_stream, filename, header_row)
-            if not df.empty:
-                return self._clean_dataframe(df)
+            if parse_pool is not None:
+                try:
+                    df, log_entries = parse_pool.submit(_parse_excel_in_worker, file_data, filename, header_row).result()
+                    for entry in log_entries:
+                        self.log(entry['message'], entry['level'])
+                    return df
+                except BrokenProcessPool as e:
+                    self.log(f"Parse worker unavailable, parsing {filename} in-process: {str(e)}", "WARNING")
             
-            return pd.DataFrame()
+            return self._parse_excel_file(file_data, filename, header_row)
             
         except Exception as e:
             self.log(f"Failed to read {filename}: {str(e)}", "ERROR")
             return pd.DataFrame()
     
+    def _read_shared_strings(self, zip_ref: zipfile.ZipFile) -> List[str]:
+        """Read the workbook's shared string table (cells with t="s" store an index into it)"""
+        if 'xl/sharedStrings.xml' not in zip_ref.namelist():
+            return []
+        
+        strings = []
+        with zip_ref.open('xl/sharedStrings.xml') as xml_file:
+            for _, item in etree.iterparse(xml_file, tag=f'{SHEET_NS}si'):
+                # Rich text is split into runs, each with its own <t>
+                strings.append(''.join(t.text or '' for t in item.iter(f'{SHEET_NS}t')))
+                item.clear()
+        return strings
+    
     def _try_raw_xml_extraction(self, file_stream: io.BytesIO, filename: str, header_row: int) -> pd.DataFrame:
         """Extract data from Excel XML for corrupted files"""
         try:
@@ -1165,22 +2017,40 @@ class BlinkitHOTScheduler:
                 if not worksheet_files:
                     return pd.DataFrame()
                 
-                xml_content = zip_ref.read(worksheet_files[0]).decode('utf-8')
-                tree = etree.fromstring(xml_content.encode('utf-8'))
-                
-                # Extract cells
-                ns = {'ns': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
-                rows = tree.xpath('//ns:row', namespaces=ns)
+                shared_strings = self._read_shared_strings(zip_ref)
                 
+                # Stream rows and free each one once read, so only a row at a time is held in memory
                 data = []
-                for row in rows:
-                    row_data = []
-                    cells = row.xpath('ns:c', namespaces=ns)
-                    for cell in cells:
-                        value = cell.xpath('ns:v/text()', namespaces=ns)
-                        row_data.append(value[0] if value else '')
-                    if row_data:
-                        data.append(row_data)
+                with zip_ref.open(worksheet_files[0]) as xml_file:
+                    for _, row in etree.iterparse(xml_file, tag=f'{SHEET_NS}row'):
+                        row_data = []
+                        for cell in row.iterchildren(f'{SHEET_NS}c'):
+                            # Empty cells are omitted from the XML - pad up to the cell's column
+                            cell_ref = cell.get('r')
+                            if cell_ref:
+                                row_data.extend([''] * (self._column_index(cell_ref) - len(row_data)))
+                            
+                            cell_type = cell.get('t')
+                            if cell_type == 'inlineStr':
+                                value = ''.join(t.text or '' for t in cell.iter(f'{SHEET_NS}t'))
+                            else:
+                                value = cell.findtext(f'{SHEET_NS}v', default='')
+                                if cell_type == 's' and value:
+                                    # Corrupted workbooks may hold bad indexes - keep the raw value for that cell
+                                    try:
+                                        index = int(value)
+                                    except ValueError:
+                                        index = -1
+                                    if 0 <= index < len(shared_strings):
+                                        value = shared_strings[index]
+                            row_data.append(value)
+                        
+                        if row_data:
+                            data.append(row_data)
+                        
+                        row.clear()
+                        while row.getprevious() is not None:
+                            del row.getparent()[0]
                 
                 if not data:
                     return pd.DataFrame()
@@ -1206,17 +2076,19 @@ class BlinkitHOTScheduler:
         
         # Remove single quotes from all string columns
         string_columns = df.select_dtypes(include=['object']).columns
-        for col in string_columns:
-            df[col] = df[col].astype(str).str.replace("'", "", regex=False)
+        if len(string_columns):
+            df[string_columns] = df[string_columns].astype(str).apply(lambda s: s.str.translate(_QUOTE_TABLE))
         
         # Remove rows where second column (B column) is blank/empty
         if len(df.columns) >= 2:
-            second_col = df.columns[1]
-            mask = ~(
-                df[second_col].isna() | 
-                (df[second_col].astype(str).str.strip() == "") |
-                (df[second_col].astype(str).str.strip() == "nan")
-            )
+            second_col = df.iloc[:, 1]
+            if pd.api.types.is_numeric_dtype(second_col) or pd.api.types.is_datetime64_any_dtype(second_col):
+                # Numeric and datetime values are only blank when missing - no string conversion needed
+                mask = second_col.notna()
+            else:
+                # Strip once and test both blank markers in one pass
+                stripped = second_col.astype(str).str.strip()
+                mask = ~(second_col.isna() | stripped.isin(("", "nan")))
             df = df[mask]
             self.log(f"After removing blank B column rows: {df.shape}", "INFO")
         
@@ -1234,7 +2106,7 @@ class BlinkitHOTScheduler:
             df[item_code_col] = df[item_code_col].str.replace(r'\.0$', '', regex=True)
             
             original_count = len(df)
-            df = df.drop_duplicates(subset=[po_number_col, item_code_col], keep='first')
+            df = df.drop_duplicates(subset=[po_number_col, item_code_col], keep='first', ignore_index=True)
             duplicates_removed = original_count - len(df)
             
             if duplicates_removed > 0:
@@ -1242,7 +2114,7 @@ class BlinkitHOTScheduler:
         else:
             # Fall back to all columns if required columns don't exist
             original_count = len(df)
-            df = df.drop_duplicates()
+            df = df.drop_duplicates(ignore_index=True)
             duplicates_removed = original_count - len(df)
             
             if duplicates_removed > 0:
@@ -1252,6 +2124,20 @@ class BlinkitHOTScheduler:
         return df
 
 
+# Per-process scheduler used by ProcessPoolExecutor parse workers (no API clients needed)
+_worker_scheduler: Optional[BlinkitHOTScheduler] = None
+
+
+def _parse_excel_in_worker(file_data: bytes, filename: str, header_row: int) -> Tuple[pd.DataFrame, List[Dict[str, str]]]:
+    """Process pool entry point: parse downloaded Excel bytes, returning the DataFrame and its log entries"""
+    global _worker_scheduler
+    if _worker_scheduler is None:
+        _worker_scheduler = BlinkitHOTScheduler()
+    _worker_scheduler.logs.clear()
+    df = _worker_scheduler._parse_excel_file(file_data, filename, header_row)
+    return df, list(_worker_scheduler.logs)
+
+
 def run_once():
     """Run the workflow once (for GitHub Actions)"""
     automation = BlinkitHOTScheduler()